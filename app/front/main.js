@@ -140,8 +140,19 @@ function connectWebSocket(roomId, playerId) {
 
 function handleWebSocketMessage(data, roomId) {
     const msg = JSON.parse(data);
+    // Bursts of room events arrive coalesced into one frame, in order
+    if (msg.type === 'batch') {
+        msg.messages.forEach(m => handleRoomEvent(m, roomId));
+    } else {
+        handleRoomEvent(msg, roomId);
+    }
+}
+
+function handleRoomEvent(msg, roomId) {
     switch (msg.type) {
         case 'game_started':
+            window.totalRounds = msg.total_rounds;
+            window.numPiles = msg.shared_cards.length;
             displayGameCards(msg.player_cards, window.currentPlayerId, msg.shared_cards);
             updateSharedPiles(msg.shared_piles);
             updatePlayerStatus(msg.player_status);
@@ -190,7 +201,7 @@ async function updatePlayerList(roomId) {
         `<li>${p.name} ${p.role === 'admin' ? '(Admin)' : ''}</li>`
     ).join('');
     document.getElementById('players').innerHTML =
-        `<h3>Players in Room (${data.players.length}/10):</h3>
+        `<h3>Players in Room (${data.players.length}/${data.settings.max_players}):</h3>
         <ul>${playersList}</ul>`;
 }
 
@@ -213,7 +224,7 @@ function displayGameCards(allPlayerCards, myPlayerId, sharedCards) {
 
     document.getElementById('result').innerHTML =
         `<h3>Game Started!</h3>
-        <p><strong>Round: 1/10</strong></p>
+        <p><strong>Round: 1/${window.totalRounds}</strong></p>
         <p><strong>Your Points:</strong> <span id="myPoints">0</span></p>
         <p><strong>Your Last Selected:</strong> <span id="lastSelected">None</span></p>
         <div id="playerStatus" style="margin:10px 0;padding:10px;border:1px solid #ddd;border-radius:5px;"></div>
@@ -264,7 +275,7 @@ function updateLastSelected(lastSelectedCards) {
 }
 
 function updateSharedPiles(sharedPiles) {
-    for (let i = 0; i < 4; i++) {
+    for (let i = 0; i < window.numPiles; i++) {
         const pileCards = sharedPiles[i] || [];
         const pileElement = document.getElementById(`pile${i}`);
         if (pileElement) {
@@ -316,7 +327,7 @@ function showPenaltyNotification(card) {
 function enablePileSelection(card) {
     window.penaltyCard = card;
     // Make piles clickable
-    for (let i = 0; i < 4; i++) {
+    for (let i = 0; i < window.numPiles; i++) {
         const pileElement = document.getElementById(`pile${i}`);
         if (pileElement) {
             pileElement.style.cursor = 'pointer';
@@ -342,7 +353,7 @@ function clearPenaltyNotification() {
     if (notification) notification.remove();
     
     // Remove pile selection styling
-    for (let i = 0; i < 4; i++) {
+    for (let i = 0; i < window.numPiles; i++) {
         const pileElement = document.getElementById(`pile${i}`);
         if (pileElement) {
             pileElement.style.cursor = 'default';
@@ -441,7 +452,7 @@ function unfreezeCardSelection() {
 function updateRoundDisplay(roundNumber) {
     document.querySelectorAll('p').forEach(p => {
         if (p.textContent.includes('Round:')) {
-            p.innerHTML = `<strong>Round: ${roundNumber}/10</strong>`;
+            p.innerHTML = `<strong>Round: ${roundNumber}/${window.totalRounds}</strong>`;
         }
     });
 }
\ No newline at end of file
@@ -1,19 +1,34 @@
 import random
+from bisect import bisect_left
 from typing import Dict, List
 
+# Standard table; event rooms may override any of these on creation
+DEFAULT_MAX_PLAYERS = 10
+DEFAULT_DECK_SIZE = 104
+DEFAULT_HAND_SIZE = 10
+DEFAULT_NUM_PILES = 4
+
 class Game:
-    def __init__(self, room_id: str, players: List[Dict]):
+    def __init__(self, room_id: str, players: List[Dict], deck_size: int = DEFAULT_DECK_SIZE,
+                 hand_size: int = DEFAULT_HAND_SIZE, num_piles: int = DEFAULT_NUM_PILES):
         self.room_id = room_id
         self.players = players
+        self.deck_size = deck_size  # Cards are numbered 1..deck_size
+        self.hand_size = hand_size  # Cards dealt per player, also the number of rounds
+        self.num_piles = num_piles
         self.player_cards = {}
         self.current_round = 1
         self.round_selections = {}  # {round: {player_id: card}}
         self.player_round_status = {}  # {player_id: has_selected_this_round}
         self.player_last_card = {}  # {player_id: last_selected_card}
-        self.shared_piles = {0: [], 1: [], 2: [], 3: []}  # 4 piles next to shared cards
+        self.shared_piles = {i: [] for i in range(num_piles)}  # piles next to shared cards
+        self.pile_tops = [0] * num_piles  # Top card of every pile, kept sorted
+        self.pile_order = list(range(num_piles))  # Pile index for each entry of pile_tops
         self.player_points = {}  # {player_id: negative_points}
         self.pending_cards = []  # Cards waiting to be processed after penalty
         self.processed_cards = set()  # Cards already processed in current round
+        self.round_queue = []  # [(card, player_id)] selections of current round, smallest first
+        self.round_cursor = 0  # Position of the next unprocessed card in round_queue
     
     def calculate_card_points(self, card):
         """Calculate negative points for a card"""
@@ -29,95 +44,66 @@ class Game:
             return 1
     
     def start_game(self):
-        """Step 1: Give each player 10 unique random cards + 4 shared cards"""
-        # Create deck of all cards 1-104
-        deck = list(range(1, 105))
-        random.shuffle(deck)
+        """Step 1: Give each player hand_size unique random cards + num_piles shared cards"""
+        used_cards = len(self.players) * self.hand_size
+        if used_cards + self.num_piles > self.deck_size:
+            raise ValueError("Not enough cards in the deck for this table")
+        
+        # Draw only the cards that are dealt instead of shuffling the whole deck
+        deck = random.sample(range(1, self.deck_size + 1), used_cards + self.num_piles)
         
-        # Distribute 10 cards to each player and sort them
+        # Distribute hand_size cards to each player and sort them
         for i, player in enumerate(self.players):
-            start_idx = i * 10
-            cards = deck[start_idx:start_idx + 10]
+            start_idx = i * self.hand_size
+            cards = deck[start_idx:start_idx + self.hand_size]
             self.player_cards[player["id"]] = sorted(cards)
             # Initialize points to 0
             self.player_points[player["id"]] = 0
         
-        # Get 4 shared cards from remaining deck
-        used_cards = len(self.players) * 10
-        self.shared_cards = sorted(deck[used_cards:used_cards + 4])
+        # Get shared cards from remaining deck
+        self.shared_cards = sorted(deck[used_cards:])
         
-        # Initialize piles with shared cards
+        # Initialize piles with shared cards (already sorted, so pile i has the i-th smallest top)
         for i, card in enumerate(self.shared_cards):
             self.shared_piles[i] = [card]
+        self.pile_tops = list(self.shared_cards)
+        self.pile_order = list(range(self.num_piles))
         
         return {"player_cards": self.player_cards, "shared_cards": self.shared_cards, "player_points": self.player_points, "shared_piles": self.shared_piles}
         
     def place_cards_on_piles(self, round_selections):
         """Place selected cards on shared piles starting from smallest"""
-        # Get all selected cards sorted by value (smallest first)
-        card_player_map = {card: player_id for player_id, card in round_selections.items()}
-        selected_cards = sorted(round_selections.values())
-        
-        placement_results = []
-        
-        # Process each card from smallest to largest
-        for card in selected_cards:
-            player_id = card_player_map[card]
-            
-            if self.can_place_card(card):
-                best_pile = self.find_best_pile(card)
-                
-                # Check if pile will have 6 cards (5 + new card)
-                if len(self.shared_piles[best_pile]) == 5:
-                    # Player must take the 5 cards, leave only the new card
-                    taken_cards = self.shared_piles[best_pile].copy()
-                    penalty_points = sum(self.calculate_card_points(c) for c in taken_cards)
-                    self.player_points[player_id] += penalty_points
-                    self.shared_piles[best_pile] = [card]  # Only new card remains
-                    
-                    self.processed_cards.add(card)
-                    placement_results.append({
-                        "player_id": player_id,
-                        "card": card,
-                        "action": "took_pile_6th",
-                        "pile": best_pile,
-                        "penalty_points": penalty_points,
-                        "taken_cards": taken_cards
-                    })
-                else:
-                    # Normal placement
-                    self.shared_piles[best_pile].append(card)
-                    self.processed_cards.add(card)
-                    placement_results.append({
-                        "player_id": player_id,
-                        "card": card,
-                        "action": "placed",
-                        "pile": best_pile
-                    })
-            else:
-                # Card too low - needs penalty resolution
-                placement_results.append({
-                    "player_id": player_id,
-                    "card": card,
-                    "action": "penalty_required"
-                })
-                # Stop processing until penalty is resolved
-                break
-        
-        return placement_results
+        # Sort the round once; penalty resolution resumes from round_cursor
+        self.round_queue = sorted((card, player_id) for player_id, card in round_selections.items())
+        self.round_cursor = 0
+        return self.continue_card_placement(round_selections)
     
     def can_place_card(self, card):
         """Check if card can be placed on any pile incrementally"""
-        for pile_idx in range(4):
-            pile_top = self.get_pile_top(pile_idx)
-            if card > pile_top:
-                return True
-        return False
+        return card > self.pile_tops[0]
     
     def get_pile_top(self, pile_idx):
         """Get the top card of a pile"""
         return self.shared_piles[pile_idx][-1] if self.shared_piles[pile_idx] else 0
     
+    def set_pile_top(self, pile_idx, card):
+        """Keep the sorted pile_tops index in sync after the top of a pile changes"""
+        pos = bisect_left(self.pile_tops, self.get_pile_top(pile_idx))
+        while self.pile_order[pos] != pile_idx:
+            pos += 1
+        
+        # Placing a card never reorders the piles, so the top is replaced in place
+        if (pos == 0 or self.pile_tops[pos - 1] < card) and \
+                (pos == len(self.pile_tops) - 1 or card < self.pile_tops[pos + 1]):
+            self.pile_tops[pos] = card
+            return
+        
+        del self.pile_tops[pos]
+        del self.pile_order[pos]
+        new_pos = bisect_left(self.pile_tops, card)
+        self.pile_tops.insert(new_pos, card)
+        self.pile_order.insert(new_pos, pile_idx)
+    
     def take_pile(self, player_id: str, pile_idx: int, low_card: int):
         """Player takes a pile and gets penalty points"""
         # Calculate penalty points
@@ -128,6 +114,7 @@ class Game:
         self.player_points[player_id] += penalty_points
         
         # Clear the pile and place the low card
+        self.set_pile_top(pile_idx, low_card)
         self.shared_piles[pile_idx] = [low_card]
         
         # Mark the low card as processed
@@ -137,18 +124,14 @@ class Game:
     
     def continue_card_placement(self, round_selections):
         """Continue placing remaining unprocessed cards"""
-        # Get all selected cards sorted by value
-        card_player_map = {card: player_id for player_id, card in round_selections.items()}
-        selected_cards = sorted(round_selections.values())
-        
         placement_results = []
         
         # Process only unprocessed cards from smallest to largest
-        for card in selected_cards:
+        while self.round_cursor < len(self.round_queue):
+            card, player_id = self.round_queue[self.round_cursor]
             if card in self.processed_cards:
+                self.round_cursor += 1
                 continue  # Skip already processed cards
-                
-            player_id = card_player_map[card]
             
             if self.can_place_card(card):
                 best_pile = self.find_best_pile(card)
@@ -159,6 +142,7 @@ class Game:
                     taken_cards = self.shared_piles[best_pile].copy()
                     penalty_points = sum(self.calculate_card_points(c) for c in taken_cards)
                     self.player_points[player_id] += penalty_points
+                    self.set_pile_top(best_pile, card)
                     self.shared_piles[best_pile] = [card]  # Only new card remains
                     
                     self.processed_cards.add(card)
@@ -172,6 +156,7 @@ class Game:
                     })
                 else:
                     # Normal placement
+                    self.set_pile_top(best_pile, card)
                     self.shared_piles[best_pile].append(card)
                     self.processed_cards.add(card)
                     placement_results.append({
@@ -180,6 +165,7 @@ class Game:
                         "action": "placed",
                         "pile": best_pile
                     })
+                self.round_cursor += 1
             else:
                 # Card too low - needs penalty resolution
                 placement_results.append({
@@ -194,24 +180,9 @@ class Game:
     
     def find_best_pile(self, card):
         """Find the best pile to place the card (incremental rule)"""
-        best_pile = 0
-        best_diff = float('inf')
-        
-        for pile_idx in range(4):
-            if not self.shared_piles[pile_idx]:
-                # Empty pile, use shared card as reference
-                pile_top = self.shared_cards[pile_idx] if hasattr(self, 'shared_cards') else 0
-            else:
-                # Use last card in pile
-                pile_top = self.shared_piles[pile_idx][-1]
-            
-            if card > pile_top:
-                diff = card - pile_top
-                if diff < best_diff:
-                    best_diff = diff
-                    best_pile = pile_idx
-        
-        return best_pile
+        # The closest lower top is the rightmost pile top below the card
+        pos = bisect_left(self.pile_tops, card) - 1
+        return self.pile_order[pos] if pos >= 0 else 0
     
     def select_card(self, player_id: str, card: int):
         """Player selects a card for current round"""
@@ -244,7 +215,7 @@ class Game:
     
     def next_round(self):
         """Move to next round"""
-        if self.current_round < 10:
+        if self.current_round < self.hand_size:
             self.current_round += 1
             self.player_round_status = {}  # Reset for new round
             self.processed_cards = set()  # Reset processed cards for new round
@@ -7,7 +7,8 @@ from typing import Dict, List
 import uuid
 import json
 import os
-from game_logic import Game
+import asyncio
+from game_logic import Game, DEFAULT_MAX_PLAYERS, DEFAULT_DECK_SIZE, DEFAULT_HAND_SIZE, DEFAULT_NUM_PILES
 
 app = FastAPI(title="6 Nimmt!")
 
@@ -38,6 +39,50 @@ async def join_page(room_id: str):
 rooms: Dict[str, Dict] = {}
 connections: Dict[str, List[WebSocket]] = {}
 
+# Broadcast coalescing: events raised within a room's window are sent as one frame
+BROADCAST_WINDOW_MS = int(os.environ.get("BROADCAST_WINDOW_MS", "15"))
+pending_broadcasts: Dict[str, List[str]] = {}  # {room_id: [encoded_message]}
+flush_tasks: Dict[str, asyncio.Task] = {}  # {room_id: scheduled flush}
+flush_locks: Dict[str, asyncio.Lock] = {}  # {room_id: lock keeping frames in order}
+
+async def send_to_room(room_id: str, text: str):
+    """Send an already encoded frame to every connection in the room"""
+    for ws in connections.get(room_id, [])[:]:
+        try:
+            await ws.send_text(text)
+        except Exception as e:
+            print(f"Failed to send message: {e}")
+            if ws in connections[room_id]:
+                connections[room_id].remove(ws)
+
+async def flush_broadcasts(room_id: str, delay: float):
+    """Wait for the coalescing window, then send queued events as one frame"""
+    await asyncio.sleep(delay)
+    flush_tasks.pop(room_id, None)
+    async with flush_locks.setdefault(room_id, asyncio.Lock()):
+        encoded = pending_broadcasts.pop(room_id, [])
+        if not encoded:
+            return
+        if len(encoded) == 1:
+            frame = encoded[0]
+        else:
+            frame = '{"type": "batch", "messages": [' + ", ".join(encoded) + "]}"
+        await send_to_room(room_id, frame)
+
+async def broadcast(room_id: str, message: Dict):
+    """Queue a message for everyone in the room, batching bursts of events"""
+    # Encode now so the frame reflects the game state at the time of the event
+    encoded = json.dumps(message)
+    window_ms = rooms.get(room_id, {}).get("broadcast_window_ms", BROADCAST_WINDOW_MS)
+    if window_ms <= 0:
+        async with flush_locks.setdefault(room_id, asyncio.Lock()):
+            await send_to_room(room_id, encoded)
+        return
+    
+    pending_broadcasts.setdefault(room_id, []).append(encoded)
+    if room_id not in flush_tasks:
+        flush_tasks[room_id] = asyncio.create_task(flush_broadcasts(room_id, window_ms / 1000))
+
 class Player(BaseModel):
     name: str
 
@@ -45,7 +90,18 @@ class Room(BaseModel):
     name: str
 
 @app.post("/room")
-async def create_room(player: Player):
+async def create_room(player: Player, broadcast_window_ms: int = BROADCAST_WINDOW_MS,
+                      max_players: int = DEFAULT_MAX_PLAYERS, deck_size: int = DEFAULT_DECK_SIZE,
+                      hand_size: int = DEFAULT_HAND_SIZE, num_piles: int = DEFAULT_NUM_PILES):
+    if broadcast_window_ms < 0:
+        raise HTTPException(status_code=400, detail="Broadcast window must not be negative")
+    
+    if min(max_players, deck_size, hand_size, num_piles) < 1:
+        raise HTTPException(status_code=400, detail="Room settings must be positive")
+    
+    if max_players * hand_size + num_piles > deck_size:
+        raise HTTPException(status_code=400, detail="Deck is too small for this many players, cards and piles")
+    
     room_id = str(uuid.uuid4())[:5]
     player_id = str(uuid.uuid4())[:8]
     rooms[room_id] = {
@@ -54,17 +110,20 @@ async def create_room(player: Player):
             "name": player.name,
             "role": "admin"
         }],
-        "status": "waiting"
+        "status": "waiting",
+        "broadcast_window_ms": broadcast_window_ms,
+        "settings": {
+            "max_players": max_players,
+            "deck_size": deck_size,
+            "hand_size": hand_size,
+            "num_piles": num_piles
+        }
     }
     
     # Broadcast to existing connections (if any)
     if room_id in connections:
         message = {"type": "room_created", "admin_name": player.name}
-        for ws in connections[room_id][:]:
-            try:
-                await ws.send_text(json.dumps(message))
-            except:
-                connections[room_id].remove(ws)
+        await broadcast(room_id, message)
     
     # Return with redirect URL
     return {"room_id": room_id, "player_id": player_id, "redirect_url": f"/join/{room_id}"}
@@ -77,7 +136,7 @@ async def join_room(room_id: str, player: Player):
     if rooms[room_id]["status"] == "started":
         raise HTTPException(status_code=400, detail="Game already started")
     
-    if len(rooms[room_id]["players"]) >= 10:
+    if len(rooms[room_id]["players"]) >= rooms[room_id]["settings"]["max_players"]:
         raise HTTPException(status_code=400, detail="Room is full")
     
     player_id = str(uuid.uuid4())[:8]
@@ -94,13 +153,7 @@ async def join_room(room_id: str, player: Player):
     if room_id in connections and connections[room_id]:
         message = {"type": "player_joined", "player_name": player.name}
         print(f"Broadcasting to {len(connections[room_id])} connections")
-        for ws in connections[room_id][:]:
-            try:
-                await ws.send_text(json.dumps(message))
-                print(f"Sent message to WebSocket")
-            except Exception as e:
-                print(f"Failed to send message: {e}")
-                connections[room_id].remove(ws)
+        await broadcast(room_id, message)
     
     return {"player_id": player_id, "room_id": room_id}
 
@@ -123,7 +176,9 @@ async def start_game(room_id: str, player_id: str):
     if not admin:
         raise HTTPException(status_code=403, detail="Only admin can start the game")
     
-    game = Game(room_id, rooms[room_id]["players"])
+    settings = rooms[room_id]["settings"]
+    game = Game(room_id, rooms[room_id]["players"], deck_size=settings["deck_size"],
+                hand_size=settings["hand_size"], num_piles=settings["num_piles"])
     game_data = game.start_game()
     
     rooms[room_id]["status"] = "started"
@@ -145,15 +200,9 @@ async def start_game(room_id: str, player_id: str):
                 "status": "thinking"
             }
         
-        message = {"type": "game_started", "player_cards": game_data["player_cards"], "shared_cards": game_data["shared_cards"], "player_points": game_data["player_points"], "shared_piles": game_data["shared_piles"], "current_round": 1, "player_status": player_status}
+        message = {"type": "game_started", "player_cards": game_data["player_cards"], "shared_cards": game_data["shared_cards"], "player_points": game_data["player_points"], "shared_piles": game_data["shared_piles"], "current_round": 1, "total_rounds": game.hand_size, "player_status": player_status}
         print(f"Broadcasting game start to {len(connections[room_id])} connections")
-        for ws in connections[room_id][:]:
-            try:
-                await ws.send_text(json.dumps(message))
-                print(f"Sent game start message to WebSocket")
-            except Exception as e:
-                print(f"Failed to send game start message: {e}")
-                connections[room_id].remove(ws)
+        await broadcast(room_id, message)
     else:
         print(f"No connections found for room {room_id}")
     
@@ -227,11 +276,7 @@ async def select_card(room_id: str, player_id: str, card: int):
                     "penalty_needed": penalty_needed,
                     "player_status": player_status
                 }
-                for ws in connections[room_id][:]:
-                    try:
-                        await ws.send_text(json.dumps(message))
-                    except Exception as e:
-                        connections[room_id].remove(ws)
+                await broadcast(room_id, message)
             
             # Only move to next round if no penalty is needed
             if not penalty_needed:
@@ -242,11 +287,7 @@ async def select_card(room_id: str, player_id: str, card: int):
                         "round": game.current_round,
                         "message": f"Round {game.current_round} is finished! Ready for next round."
                     }
-                    for ws in connections[room_id][:]:
-                        try:
-                            await ws.send_text(json.dumps(finish_message))
-                        except Exception as e:
-                            connections[room_id].remove(ws)
+                    await broadcast(room_id, finish_message)
                 
                 if game.next_round():
                     rooms[room_id]["current_round"] = game.current_round
@@ -263,11 +304,7 @@ async def select_card(room_id: str, player_id: str, card: int):
                             }
                         
                         end_message = {"type": "round_ended", "next_round": game.current_round, "player_status": reset_player_status}
-                        for ws in connections[room_id][:]:
-                            try:
-                                await ws.send_text(json.dumps(end_message))
-                            except Exception as e:
-                                connections[room_id].remove(ws)
+                        await broadcast(room_id, end_message)
                 else:
                     rooms[room_id]["status"] = "finished"
                     # Find winner (player with lowest penalty points)
@@ -283,11 +320,7 @@ async def select_card(room_id: str, player_id: str, card: int):
                             "winner_points": min_points,
                             "final_scores": {pid: {"name": next(p["name"] for p in rooms[room_id]["players"] if p["id"] == pid), "points": points} for pid, points in game.player_points.items()}
                         }
-                        for ws in connections[room_id][:]:
-                            try:
-                                await ws.send_text(json.dumps(finish_game_message))
-                            except Exception as e:
-                                connections[room_id].remove(ws)
+                        await broadcast(room_id, finish_game_message)
         else:
             # Broadcast card selection with player status
             if room_id in connections and connections[room_id]:
@@ -310,11 +343,7 @@ async def select_card(room_id: str, player_id: str, card: int):
                     "last_selected": game.player_last_card,
                     "player_status": player_status
                 }
-                for ws in connections[room_id][:]:
-                    try:
-                        await ws.send_text(json.dumps(message))
-                    except Exception as e:
-                        connections[room_id].remove(ws)
+                await broadcast(room_id, message)
         
         return {"message": "Card selected", "card": card, "round": game.current_round}
     else:
@@ -357,11 +386,7 @@ async def take_pile(room_id: str, player_id: str, pile_idx: int, low_card: int):
             "all_cards_processed": all_cards_processed,
             "current_round": game.current_round
         }
-        for ws in connections[room_id][:]:
-            try:
-                await ws.send_text(json.dumps(message))
-            except Exception as e:
-                connections[room_id].remove(ws)
+        await broadcast(room_id, message)
     
     # If all cards processed, move to next round
     if all_cards_processed and not more_penalties:
@@ -372,11 +397,7 @@ async def take_pile(room_id: str, player_id: str, pile_idx: int, low_card: int):
                 "round": game.current_round,
                 "message": f"Round {game.current_round} is finished! Ready for next round."
             }
-            for ws in connections[room_id][:]:
-                try:
-                    await ws.send_text(json.dumps(finish_message))
-                except Exception as e:
-                    connections[room_id].remove(ws)
+            await broadcast(room_id, finish_message)
         
         if game.next_round():
             rooms[room_id]["current_round"] = game.current_round
@@ -393,11 +414,7 @@ async def take_pile(room_id: str, player_id: str, pile_idx: int, low_card: int):
                     }
                 
                 end_message = {"type": "round_ended", "next_round": game.current_round, "player_status": reset_player_status}
-                for ws in connections[room_id][:]:
-                    try:
-                        await ws.send_text(json.dumps(end_message))
-                    except Exception as e:
-                        connections[room_id].remove(ws)
+                await broadcast(room_id, end_message)
         else:
             rooms[room_id]["status"] = "finished"
             # Find winner (player with lowest penalty points)
@@ -413,11 +430,7 @@ async def take_pile(room_id: str, player_id: str, pile_idx: int, low_card: int):
                     "winner_points": min_points,
                     "final_scores": {pid: {"name": next(p["name"] for p in rooms[room_id]["players"] if p["id"] == pid), "points": points} for pid, points in game.player_points.items()}
                 }
-                for ws in connections[room_id][:]:
-                    try:
-                        await ws.send_text(json.dumps(finish_game_message))
-                    except Exception as e:
-                        connections[room_id].remove(ws)
+                await broadcast(room_id, finish_game_message)
     return {"message": "Pile taken", "penalty_points": penalty_points, "more_penalties": more_penalties}
 
 @app.websocket("/ws/{room_id}/{player_id}")